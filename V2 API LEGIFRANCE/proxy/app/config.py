@@ -27,6 +27,18 @@ LEGIFRANCE_API_BASE = os.getenv(
 
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))
 
+# Micro-batching des appels LLM (/plan)
+BATCH_WINDOW_MS = int(os.getenv("BATCH_WINDOW_MS", "50"))
+MAX_BATCH = int(os.getenv("MAX_BATCH", "8"))
+
+# Validation des sorties LLM dans un thread (utile si les validateurs sont lourds)
+VALIDATE_IN_THREAD = os.getenv("VALIDATE_IN_THREAD", "0") == "1"
+
+# Cache partagé entre workers (token PISTE, IDs LEGIARTI). Optionnel.
+REDIS_URL = os.getenv("REDIS_URL")
+# Timeout Redis court : une panne du cache ne doit pas ralentir les requêtes
+REDIS_TIMEOUT_MS = int(os.getenv("REDIS_TIMEOUT_MS", "200"))
+
 
 def check_config():
     """
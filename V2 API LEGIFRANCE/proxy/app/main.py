@@ -1,7 +1,38 @@
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from starlette.requests import Request
+from starlette.responses import Response
 
 from app.routes.resolve import router as resolve_router
 from app.routes.query import router as query_router
+from app.services.legifrance import aclose_client
+from app.services.shared_cache import init_shared_cache, aclose_shared_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Cycle de vie de l'app : ressources partagées ouvertes au démarrage,
+    fermées proprement au shutdown.
+    """
+    await init_shared_cache()
+
+    try:
+        yield
+    finally:
+        await aclose_client()
+        await aclose_shared_cache()
+
+
+# Réponse de santé pré-construite (sondes de liveness très fréquentes)
+_HEALTH = Response(b'{"status":"ok"}', media_type="application/json")
+
+
+async def health(request: Request) -> Response:
+    return _HEALTH
 
 
 def create_app() -> FastAPI:
@@ -13,6 +44,7 @@ def create_app() -> FastAPI:
         title="Proxy Légifrance v2",
         version="0.1.0",
         description="Proxy HTTP pour interroger l'API Légifrance au service de ton IA juridique.",
+        lifespan=lifespan,
     )
 
     # Routes pour les résolutions précises (code + article, lois numérotées, etc.)
@@ -22,12 +54,21 @@ def create_app() -> FastAPI:
     app.include_router(query_router, prefix="/query", tags=["query"])
 
     # Petit endpoint de santé pour vérifier que le proxy tourne
-    @app.get("/health", tags=["health"])
-    async def health():
-        return {"status": "ok"}
+    # (route Starlette brute : ni injection de dépendances ni sérialisation)
+    app.add_route("/health", health, methods=["GET"])
 
     return app
 
 
+# Boucle d'événements uvloop (libuv) hors Windows.
+# En production, lancer avec : uvicorn app.main:app --loop uvloop --http httptools
+if sys.platform != "win32":
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
 # Instance globale utilisée par uvicorn
 app = create_app()
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import inspect
 from datetime import date
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Callable, Tuple
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.responses import Response
 from pydantic import BaseModel, Field
 
+from app.config import VALIDATE_IN_THREAD
 from app.services.intent_validator import (
     extract_explicit_refs,
     validate_legal_intent,
@@ -17,6 +22,9 @@ from app.services.plan_validator import (
     build_plan_feedback,
 )
 from app.services.llm_openai import OpenAILLM
+from app.services.llm_batcher import LLMBatcher
+from app.services.legifrance import get_token
+from app.utils.singleflight import singleflight
 from app.prompts.planning_prompts import (
     INTENT_SYSTEM_PROMPT,
     PLANNER_SYSTEM_PROMPT,
@@ -24,6 +32,9 @@ from app.prompts.planning_prompts import (
 
 router = APIRouter()
 
+# Références fortes vers les tâches de fond (sinon le GC peut les annuler)
+_background_tasks: set[asyncio.Task] = set()
+
 
 # -----------------------------
 # Models IO
@@ -42,13 +53,74 @@ class PlanResponse(BaseModel):
     warnings: List[str] = Field(default_factory=list)
 
 
+# -----------------------------
+# Dependencies
+# -----------------------------
+
+async def open_planning_state(app: Any) -> None:
+    """
+    À appeler dans le lifespan de l'app : un seul client LLM (donc un seul
+    pool de connexions) et un seul micro-batcher, partagés par les requêtes /plan.
+    """
+    app.state.llm = OpenAILLM()
+    app.state.llm_batcher = LLMBatcher(app.state.llm)
+    await app.state.llm_batcher.start()
+
+
+async def close_planning_state(app: Any) -> None:
+    """
+    À appeler au shutdown : libère les appelants en attente du micro-batcher,
+    puis ferme le client LLM et son pool HTTP.
+    """
+    batcher = getattr(app.state, "llm_batcher", None)
+    if batcher is not None:
+        app.state.llm_batcher = None
+        await batcher.stop()
+
+    llm = getattr(app.state, "llm", None)
+    if llm is None:
+        return
+    app.state.llm = None
+    close = getattr(llm, "aclose", None) or getattr(llm, "close", None)
+    if close is not None:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+
+
+def get_llm(request: Request) -> OpenAILLM:
+    """
+    Client LLM partagé, créé une seule fois dans le lifespan (open_planning_state).
+    """
+    return request.app.state.llm
+
+
+def get_llm_batcher(request: Request) -> LLMBatcher:
+    """
+    Micro-batcher partagé (premier essai de chaque prompt).
+    """
+    return request.app.state.llm_batcher
+
+
+async def _prefetch_piste_token() -> None:
+    """
+    Préchauffe le token PISTE pendant que les appels LLM tournent :
+    le plan produit est exécuté via /resolve juste après.
+    Best-effort : ne doit jamais faire échouer /plan.
+    """
+    try:
+        await get_token()
+    except Exception:
+        pass
+
+
 # -----------------------------
 # Prompt user builders (inject question + locked refs / intent)
 # -----------------------------
 
-def build_intent_user_prompt(question: str, locked_refs: Dict[str, Any]) -> str:
+def build_intent_user_prompt(question: str, locked_refs_json: str) -> str:
     """
-    Injecte la question + références verrouillées.
+    Injecte la question + références verrouillées (déjà sérialisées en JSON).
     Le LLM doit recopier explicit_refs (sans ajout).
     """
     return (
@@ -56,20 +128,20 @@ def build_intent_user_prompt(question: str, locked_refs: Dict[str, Any]) -> str:
         f"<<<{question}>>>\n\n"
         "Références explicites détectées (VERROUILLÉES). "
         "Tu dois recopier ces valeurs dans explicit_refs et tu n'as PAS le droit d'en ajouter:\n"
-        f"{json.dumps(locked_refs, ensure_ascii=False)}\n\n"
+        f"{locked_refs_json}\n\n"
         "Réponds uniquement en JSON."
     )
 
 
-def build_planner_user_prompt(legal_intent: Dict[str, Any], as_of: str, question: str) -> str:
+def build_planner_user_prompt(legal_intent_json: str, as_of: str, question: str) -> str:
     """
-    Injecte le LegalIntent + date de référence + question originale.
+    Injecte le LegalIntent (déjà sérialisé en JSON) + date de référence + question originale.
     """
     return (
         "Construis un ExtractionPlan exécutable à partir du LegalIntent ci-dessous.\n"
         f"Date de référence (as_of): {as_of}\n"
         f"Question originale: <<<{question}>>>\n\n"
-        f"LegalIntent:\n{json.dumps(legal_intent, ensure_ascii=False)}\n\n"
+        f"LegalIntent:\n{legal_intent_json}\n\n"
         "Réponds uniquement en JSON."
     )
 
@@ -78,6 +150,22 @@ def build_planner_user_prompt(legal_intent: Dict[str, Any], as_of: str, question
 # Generic: call LLM -> validate -> retry
 # -----------------------------
 
+_TOP_LEVEL_NOT_OBJECT = "Le JSON renvoyé doit être un objet (dict) au premier niveau."
+
+# Prompt caching OpenAI : le prompt système statique reste un préfixe identique
+# octet pour octet d'une requête à l'autre ; tout le dynamique va en queue.
+_FEEDBACK_MARKER = "\n\n<FEEDBACK>\n"
+
+
+@lru_cache(maxsize=256)
+def _cached_feedback(feedback_builder: Callable[[List[str]], str], errors: Tuple[str, ...]) -> str:
+    """
+    Les mêmes erreurs reviennent souvent d'un essai / d'une requête à l'autre :
+    on mémorise le feedback construit.
+    """
+    return feedback_builder(list(errors))
+
+
 async def llm_json_with_retry(
     llm: OpenAILLM,
     system_prompt: str,
@@ -86,16 +174,32 @@ async def llm_json_with_retry(
     feedback_builder: Callable[[List[str]], str],
     max_retries: int = 2,
     model: Optional[str] = None,
+    batcher: Optional[LLMBatcher] = None,
 ) -> Tuple[Dict[str, Any], List[str]]:
     warnings: List[str] = []
     feedback: Optional[str] = None
     last_errors: List[str] = []
 
     for _attempt in range(max_retries + 1):
-        sys = system_prompt if feedback is None else (system_prompt + "\n\n" + feedback)
-        out = await llm.complete_json(system=sys, user=user_prompt, model=model)
-
-        res = validator(out)
+        if feedback is None and batcher is not None:
+            # 1er essai: groupé avec les autres requêtes concurrentes
+            out = await batcher.submit(system=system_prompt, user=user_prompt, model=model)
+        else:
+            # retry: prompt système personnalisé (feedback), appel individuel
+            sys = system_prompt if feedback is None else (system_prompt + _FEEDBACK_MARKER + feedback)
+            out = await llm.complete_json(system=sys, user=user_prompt, model=model)
+
+        # rejet rapide: mauvais type au premier niveau, pas de validation complète
+        if not isinstance(out, dict):
+            last_errors = [_TOP_LEVEL_NOT_OBJECT]
+            feedback = _cached_feedback(feedback_builder, tuple(last_errors))
+            continue
+
+        if VALIDATE_IN_THREAD:
+            # libère la boucle d'événements pour les autres requêtes /plan
+            res = await asyncio.to_thread(validator, out)
+        else:
+            res = validator(out)
         if getattr(res, "warnings", None):
             warnings.extend(res.warnings)
 
@@ -103,7 +207,7 @@ async def llm_json_with_retry(
             return out, warnings
 
         last_errors = list(res.errors)
-        feedback = feedback_builder(res.errors)
+        feedback = _cached_feedback(feedback_builder, tuple(last_errors))
 
     raise HTTPException(
         status_code=422,
@@ -115,8 +219,27 @@ async def llm_json_with_retry(
 # Route: POST /plan
 # -----------------------------
 
-@router.post("/plan", response_model=PlanResponse)
-async def plan(req: PlanRequest) -> PlanResponse:
+# Schéma documenté dans l'OpenAPI, mais pas de re-validation pydantic de la réponse :
+# PlanResponse est construit par nos soins, on le sérialise une seule fois.
+@router.post("/plan", responses={200: {"model": PlanResponse}})
+async def plan(
+    req: PlanRequest,
+    llm: OpenAILLM = Depends(get_llm),
+    batcher: LLMBatcher = Depends(get_llm_batcher),
+) -> Response:
+    as_of = req.as_of or date.today().isoformat()
+    result = await _build_plan(req.question, as_of, llm, batcher)
+    return Response(orjson.dumps(result.model_dump()), media_type="application/json")
+
+
+# Même (question, as_of) en vol => un seul pipeline LLM pour tous les appelants
+@singleflight(lambda question, as_of, llm, batcher: (question, as_of))
+async def _build_plan(
+    question: str,
+    as_of: str,
+    llm: OpenAILLM,
+    batcher: LLMBatcher,
+) -> PlanResponse:
     """
     Pipeline:
       0) locked_refs = extract_explicit_refs(question)
@@ -124,15 +247,18 @@ async def plan(req: PlanRequest) -> PlanResponse:
       2) if is_legal == false => plan vide (court-circuit)
       3) else Prompt #2 -> ExtractionPlan (validate + retry)
     """
-    as_of = req.as_of or date.today().isoformat()
 
-    # 0) Deterministic extraction (LOCKED)
-    locked_refs = extract_explicit_refs(req.question)
+    # OAuth PISTE en parallèle : sa latence est masquée par le 1er appel LLM
+    token_task = asyncio.create_task(_prefetch_piste_token())
+    _background_tasks.add(token_task)
+    token_task.add_done_callback(_background_tasks.discard)
 
-    llm = OpenAILLM()
+    # 0) Deterministic extraction (LOCKED), hors de la boucle d'événements
+    locked_refs = await asyncio.to_thread(extract_explicit_refs, question)
 
-    # 1) Prompt #1: LegalIntent
-    intent_user = build_intent_user_prompt(req.question, locked_refs)
+    # 1) Prompt #1: LegalIntent (prompt construit une fois, réutilisé tel quel par les retries)
+    refs_json = orjson.dumps(locked_refs).decode()
+    intent_user = build_intent_user_prompt(question, refs_json)
 
     def _intent_validator(obj: Dict[str, Any]):
         return validate_legal_intent(obj, locked_refs)
@@ -145,6 +271,7 @@ async def plan(req: PlanRequest) -> PlanResponse:
         feedback_builder=build_system_feedback,
         max_retries=2,
         model="gpt-4o-mini",  # tu peux changer plus tard via env ou config
+        batcher=batcher,
     )
 
     is_legal = bool(((legal_intent.get("intent") or {}).get("is_legal")) is True)
@@ -153,7 +280,7 @@ async def plan(req: PlanRequest) -> PlanResponse:
     if not is_legal:
         extraction_plan = {
             "version": "1.0",
-            "meta": {"user_question": req.question, "as_of": as_of, "jurisdiction": "FR"},
+            "meta": {"user_question": question, "as_of": as_of, "jurisdiction": "FR"},
             "plan": [],
             "missing_information": legal_intent.get("missing_information", []),
             "constraints": {"max_sources": 12, "must_cite_sources": True},
@@ -167,7 +294,8 @@ async def plan(req: PlanRequest) -> PlanResponse:
         )
 
     # 3) Prompt #2: ExtractionPlan
-    planner_user = build_planner_user_prompt(legal_intent, as_of, req.question)
+    intent_json = orjson.dumps(legal_intent).decode()
+    planner_user = build_planner_user_prompt(intent_json, as_of, question)
 
     def _plan_validator(obj: Dict[str, Any]):
         return validate_extraction_plan(obj, legal_intent, locked_refs, as_of)
@@ -180,6 +308,7 @@ async def plan(req: PlanRequest) -> PlanResponse:
         feedback_builder=build_plan_feedback,
         max_retries=2,
         model="gpt-4o-mini",
+        batcher=batcher,
     )
 
     return PlanResponse(
@@ -1,12 +1,18 @@
 from fastapi import APIRouter
+from starlette.requests import Request
+from starlette.responses import Response
 
 router = APIRouter()
 
+_PING = Response(b'{"scope":"query","status":"ok"}', media_type="application/json")
 
-@router.get("/ping")
-async def ping_query():
+
+async def ping_query(request: Request) -> Response:
     """
     Endpoint de test pour l'espace /query.
     Plus tard : POST /query pour les questions ouvertes.
     """
-    return {"scope": "query", "status": "ok"}
+    return _PING
+
+
+router.add_route("/ping", ping_query, methods=["GET"])
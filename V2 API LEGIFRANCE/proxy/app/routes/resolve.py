@@ -1,7 +1,11 @@
+import math
 from typing import Optional
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
+from starlette.requests import Request
+from starlette.responses import Response
 
+from app.services.legifrance import LegifranceRateLimitedError
 from app.services.resolver import (
     resolve_code_article,
     NotFoundError,
@@ -11,10 +15,14 @@ from app.services.resolver import (
 
 router = APIRouter()
 
+_PING = Response(b'{"scope":"resolve","status":"ok"}', media_type="application/json")
 
-@router.get("/ping")
-async def ping_resolve():
-    return {"scope": "resolve", "status": "ok"}
+
+async def ping_resolve(request: Request) -> Response:
+    return _PING
+
+
+router.add_route("/ping", ping_resolve, methods=["GET"])
 
 
 @router.get("/code-article")
@@ -22,22 +30,46 @@ async def code_article(
     code: str = Query(..., description="Ex: Code du travail"),
     article: str = Query(..., description="Ex: L1221-1"),
     date: Optional[str] = Query(None, description="Ex: 2020-01-01 (YYYY-MM-DD)"),
+    debug: bool = Query(False, description="Renvoie la réponse brute getArticle (raw)"),
 ):
     """
     Résout un article d'un code via:
     - POST /search (récupère LEGIARTI...)
     - POST /consult/getArticle (récupère contenu)
+    Sans ?debug=1, getArticle est lu en mode "thin" (titre seulement).
     """
     try:
-        resolved = await resolve_code_article(code_hint=code, article_hint=article, date_hint=date)
-        return {
+        resolved = await resolve_code_article(
+            code_hint=code,
+            article_hint=article,
+            date_hint=date,
+            thin=not debug,
+        )
+        body = {
             "ok": True,
             "legiarti_id": resolved.legiarti_id,
             "title": resolved.title,
             "article": resolved.article_num,
             "date_version": resolved.date_version,
-            "raw": resolved.raw,  # pour debug, tu pourras ensuite renvoyer seulement le texte nettoyé
         }
+        if debug:
+            body["raw"] = resolved.raw
+        return body
+
+    except LegifranceRateLimitedError as e:
+        headers = {}
+        if e.retry_after is not None:
+            headers["Retry-After"] = str(math.ceil(e.retry_after))
+        return JSONResponse(
+            status_code=429,
+            content={
+                "ok": False,
+                "error": "RATE_LIMITED",
+                "message": str(e),
+                "retry_after": e.retry_after,
+            },
+            headers=headers,
+        )
 
     except TooBroadError as e:
         return JSONResponse(
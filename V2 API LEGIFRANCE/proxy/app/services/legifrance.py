@@ -1,8 +1,14 @@
 import asyncio
+import math
+import random
 import time
-from typing import Any, Dict, Optional
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
+import ijson
+import orjson
 
 from app.config import (
     PISTE_CLIENT_ID,
@@ -11,15 +17,27 @@ from app.config import (
     LEGIFRANCE_API_BASE,
     REQUEST_TIMEOUT,
 )
+from app.services.shared_cache import (
+    cache_delete,
+    cache_delete_if_equals,
+    cache_get_with_ttl,
+    cache_set,
+    shared_cache_enabled,
+)
 
 # ================================
 # Cache simple du token en mémoire
 # ================================
 
-_access_token: Optional[str] = None
-_token_expires_at: Optional[float] = None  # timestamp en secondes
+# (token, expire_à en timestamp secondes), publié d'un seul bloc (lecture sans lock)
+_token_state: Optional[Tuple[str, float]] = None
 _token_lock = asyncio.Lock()
 
+# Partage du token entre workers via Redis (si REDIS_URL)
+_TOKEN_KEY = "piste:token"
+_TOKEN_LOCK_KEY = "piste:token:lock"
+_TOKEN_LOCK_TTL_MS = 10_000
+
 # ================================
 # Client HTTP réutilisable (perf)
 # ================================
@@ -33,7 +51,13 @@ def _get_client() -> httpx.AsyncClient:
     """
     global _client
     if _client is None:
-        _client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
+        # HTTP/2 (paquet h2) : multiplexage des /search et /getArticle sur une connexion
+        _client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT,
+            http2=True,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            headers={"Accept": "application/json"},
+        )
     return _client
 
 
@@ -55,12 +79,19 @@ class LegifranceApiError(Exception):
     """Erreur d'appel à l'API Légifrance."""
 
 
+class LegifranceRateLimitedError(LegifranceApiError):
+    """Quota PISTE dépassé (429) malgré les retries."""
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 async def _fetch_new_token() -> str:
     """
     Récupère un nouveau token OAuth2 auprès de PISTE.
-    Met à jour le cache global _access_token et _token_expires_at.
+    Met à jour le cache global _token_state.
     """
-    global _access_token, _token_expires_at
+    global _token_state
 
     if not PISTE_CLIENT_ID or not PISTE_CLIENT_SECRET:
         raise LegifranceAuthError("PISTE_CLIENT_ID / PISTE_CLIENT_SECRET manquants.")
@@ -89,37 +120,111 @@ async def _fetch_new_token() -> str:
     expires_in = int(payload.get("expires_in", 3600))
 
     # marge de sécurité 60s
-    _access_token = token
-    _token_expires_at = time.time() + expires_in - 60
+    expires_at = time.time() + expires_in - 60
+    _token_state = (token, expires_at)
+
+    # publication pour les autres workers (valeur = token brut, expiration = PTTL)
+    await cache_set(_TOKEN_KEY, token, int((expires_at - time.time()) * 1000))
 
     return token
 
 
+async def _load_shared_token() -> Optional[Tuple[str, float]]:
+    """
+    Lit le token publié dans Redis par un worker (None si absent/expiré).
+    """
+    shared = await cache_get_with_ttl(_TOKEN_KEY)
+    if shared is None:
+        return None
+    token, ttl_ms = shared
+    return token, time.time() + ttl_ms / 1000
+
+
+async def _wait_shared_token(timeout: float = 2.0, interval: float = 0.1) -> Optional[Tuple[str, float]]:
+    """
+    Un autre worker rafraîchit le token : on attend sa publication.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        shared = await _load_shared_token()
+        if shared is not None:
+            return shared
+    return None
+
+
 async def get_token() -> str:
     """
     Retourne un token valide, en rafraîchissant si nécessaire.
-    (Protégé par lock pour éviter plusieurs refresh simultanés)
+    (Protégé par lock pour éviter plusieurs refresh simultanés ;
+    avec Redis, un seul worker rafraîchit grâce à SET NX PX)
     """
-    global _access_token, _token_expires_at
+    global _token_state
 
-    now = time.time()
-    if _access_token and _token_expires_at and now < _token_expires_at:
-        return _access_token
+    state = _token_state
+    if state is not None and time.time() < state[1]:
+        return state[0]
 
     async with _token_lock:
-        now2 = time.time()
-        if _access_token and _token_expires_at and now2 < _token_expires_at:
-            return _access_token
-        return await _fetch_new_token()
+        state = _token_state
+        if state is not None and time.time() < state[1]:
+            return state[0]
+
+        # L2 : token déjà obtenu par un autre worker ?
+        shared = await _load_shared_token()
+        refresh_locked = False
+        if shared is None and shared_cache_enabled():
+            locked = await cache_set(_TOKEN_LOCK_KEY, "1", _TOKEN_LOCK_TTL_MS, nx=True)
+            refresh_locked = locked is True
+            # False : un autre worker rafraîchit, on attend sa publication.
+            # None : Redis en erreur, inutile d'attendre, on rafraîchit nous-mêmes.
+            if locked is False:
+                shared = await _wait_shared_token()
+
+        if shared is not None:
+            _token_state = shared
+            return shared[0]
+
+        try:
+            return await _fetch_new_token()
+        finally:
+            if refresh_locked:
+                await cache_delete(_TOKEN_LOCK_KEY)
 
 
-def _invalidate_token_cache() -> None:
+async def _invalidate_token_cache(token: str) -> None:
     """
-    Invalide le cache token (utile si 401 côté Légifrance).
+    Invalide le token refusé (401 côté Légifrance), local et partagé.
+    Seulement s'il est encore le token courant : un token frais publié
+    entre-temps par un autre worker n'est pas effacé.
     """
-    global _access_token, _token_expires_at
-    _access_token = None
-    _token_expires_at = None
+    global _token_state
+    state = _token_state
+    if state is not None and state[0] == token:
+        _token_state = None
+    await cache_delete_if_equals(_TOKEN_KEY, token)
+
+
+# En-têtes d'auth mémorisés pour le token courant: (token, headers)
+_auth_headers_cache: Optional[Tuple[str, Dict[str, str]]] = None
+
+
+def _auth_headers(token: str) -> Dict[str, str]:
+    """
+    En-têtes fixes + Bearer, reconstruits uniquement quand le token change.
+    (Accept est déjà porté par le client partagé.)
+    """
+    global _auth_headers_cache
+    cached = _auth_headers_cache
+    if cached is not None and cached[0] == token:
+        return cached[1]
+
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+    }
+    _auth_headers_cache = (token, headers)
+    return headers
 
 
 def _ensure_consult_base(base: str) -> str:
@@ -135,64 +240,135 @@ def _ensure_consult_base(base: str) -> str:
     return b
 
 
+@lru_cache(maxsize=None)
+def _consult_url(endpoint: str) -> httpx.URL:
+    """
+    URL complète d'un endpoint /consult, parsée une seule fois
+    (on n'appelle jamais que search / getArticle).
+    """
+    base = _ensure_consult_base(LEGIFRANCE_API_BASE)
+    return httpx.URL(f"{base}/{endpoint.lstrip('/')}")
+
+
+# ================================
+# Retries : backoff exponentiel + jitter
+# ================================
+
+_RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+_MAX_ATTEMPTS = 5
+_RETRY_INITIAL_DELAY = 0.5  # secondes
+_RETRY_MAX_DELAY = 8.0
+
+
+def _backoff_delay(attempt: int) -> float:
+    """
+    Délai exponentiel plafonné, avec ±25% de jitter pour désynchroniser
+    les retries concurrents (évite l'effet "thundering herd").
+    """
+    delay = min(_RETRY_INITIAL_DELAY * (2 ** attempt), _RETRY_MAX_DELAY)
+    return delay * (1 + random.uniform(-0.25, 0.25))
+
+
+def _parse_retry_after(resp: httpx.Response) -> Optional[float]:
+    """
+    Lit l'en-tête Retry-After (secondes ou date HTTP). None si absent/illisible.
+    """
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        # "inf" / "nan" sont acceptés par float() : on les ignore
+        return max(0.0, seconds) if math.isfinite(seconds) else None
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def _send_once(
+    client: httpx.AsyncClient,
+    url: httpx.URL,
+    token: str,
+    json_payload: Dict[str, Any],
+    attempt: int,
+) -> Tuple[httpx.Response, bool, Optional[float]]:
+    """
+    Un seul envoi. Retourne (resp, should_retry, sleep_hint).
+    Les erreurs réseau remontent telles quelles (gérées par l'appelant).
+    """
+    resp = await client.post(url, headers=_auth_headers(token), content=orjson.dumps(json_payload))
+
+    if resp.status_code not in _RETRYABLE_STATUS:
+        return resp, False, None
+
+    retry_after = _parse_retry_after(resp)
+    if retry_after is None:
+        return resp, True, _backoff_delay(attempt)
+
+    # Retry-After au-delà du plafond : inutile d'attendre ici
+    if retry_after > _RETRY_MAX_DELAY:
+        return resp, False, None
+
+    return resp, True, retry_after
+
+
 async def _post_legifrance(endpoint: str, json_payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Appel POST générique vers l'API Légifrance (partie /consult).
     Gère automatiquement:
       - Bearer token
-      - retries (429/5xx + erreurs réseau)
-      - refresh token automatique si 401
+      - retries (429/5xx + erreurs réseau), backoff avec jitter / Retry-After
+      - refresh token automatique si 401 (une fois, hors compteur de retries)
     """
-    base = _ensure_consult_base(LEGIFRANCE_API_BASE)
-    url = f"{base}/{endpoint.lstrip('/')}"
+    url = _consult_url(endpoint)
     client = _get_client()
 
-    async def _do_post() -> httpx.Response:
-        token = await get_token()
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",  # ✅ recommandé
-        }
-        return await client.post(url, headers=headers, json=json_payload)
-
     last_exc: Optional[Exception] = None
     resp: Optional[httpx.Response] = None
-    refreshed_after_401 = False
+    auth_refreshed = False
+    attempt = 0
 
-    for attempt in range(3):
+    while attempt < _MAX_ATTEMPTS:
+        token = await get_token()
         try:
-            resp = await _do_post()
-
-            # ✅ Si 401, on force un refresh token une seule fois
-            if resp.status_code == 401 and not refreshed_after_401:
-                _invalidate_token_cache()
-                refreshed_after_401 = True
-                resp = await _do_post()
+            resp, should_retry, sleep_hint = await _send_once(client, url, token, json_payload, attempt)
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            last_exc = e
+            resp, should_retry, sleep_hint = None, True, _backoff_delay(attempt)
 
-            # retries utiles
-            if resp.status_code in (429, 500, 502, 503, 504):
-                await asyncio.sleep(0.2 * (2 ** attempt))
-                continue
+        # ✅ 401 : on invalide et on refait un essai, une seule fois
+        if resp is not None and resp.status_code == 401 and not auth_refreshed:
+            await _invalidate_token_cache(token)
+            auth_refreshed = True
+            continue
 
+        if not should_retry:
             break
 
-        except (httpx.TimeoutException, httpx.NetworkError) as e:
-            last_exc = e
-            await asyncio.sleep(0.2 * (2 ** attempt))
+        attempt += 1
+        if attempt < _MAX_ATTEMPTS and sleep_hint:
+            await asyncio.sleep(sleep_hint)
 
-    else:
+    if resp is None:
         raise LegifranceApiError(f"Échec réseau Légifrance après retries: {last_exc}")
 
-    if resp is None:
-        raise LegifranceApiError("Aucune réponse reçue de Légifrance.")
+    if resp.status_code == 429:
+        retry_after = _parse_retry_after(resp)
+        raise LegifranceRateLimitedError(
+            f"Appel Légifrance {endpoint} limité par PISTE (status=429, retry_after={retry_after})",
+            retry_after=retry_after,
+        )
 
     if resp.status_code >= 400:
         raise LegifranceApiError(
             f"Appel Légifrance {endpoint} en erreur (status={resp.status_code}, body={resp.text})"
         )
 
-    return resp.json()
+    return orjson.loads(resp.content)
 
 
 # ================================
@@ -213,3 +389,84 @@ async def lf_get_article(legiarti_id: str) -> Dict[str, Any]:
       { "id": "LEGIARTI..." }
     """
     return await _post_legifrance("getArticle", {"id": legiarti_id})
+
+
+# Seul champ utile en mode "thin" (titre du code) : on arrête la lecture dès qu'il est lu
+_THIN_TITLES_PREFIX = "article.textTitles"
+
+
+class _AsyncByteReader:
+    """
+    Adapte un flux httpx (aiter_bytes) en "fichier" asynchrone lisible par ijson.
+    Les chunks lus sont conservés pour pouvoir reconstituer le corps (body()).
+    """
+    def __init__(self, resp: httpx.Response):
+        self._chunks = resp.aiter_bytes()
+        self._read: List[bytes] = []
+
+    async def read(self, size: int = -1) -> bytes:
+        # ijson appelle read(0) pour détecter bytes/str : ne rien consommer
+        if size == 0:
+            return b""
+        # b"" signifie EOF pour ijson : on saute les éventuels chunks vides
+        async for chunk in self._chunks:
+            if chunk:
+                self._read.append(chunk)
+                return chunk
+        return b""
+
+    async def body(self) -> bytes:
+        """
+        Lit la fin du flux et retourne le corps complet (déjà lu + restant).
+        """
+        while await self.read():
+            pass
+        return b"".join(self._read)
+
+
+async def lf_get_article_thin(legiarti_id: str) -> Dict[str, Any]:
+    """
+    Variante "légère" de lf_get_article : lit la réponse en streaming (ijson)
+    et ne conserve que article.textTitles, sans construire le reste du document
+    (texte de l'article) ni lire la suite du flux.
+    Si textTitles est absent ou vide, le titre est ailleurs (titles, réponse déjà
+    "article-like") : on retourne alors la réponse complète, comme lf_get_article.
+    En cas d'erreur HTTP, on repasse par lf_get_article (retries, refresh 401).
+    """
+    url = _consult_url("getArticle")
+    client = _get_client()
+    token = await get_token()
+
+    try:
+        async with client.stream(
+            "POST",
+            url,
+            headers=_auth_headers(token),
+            content=orjson.dumps({"id": legiarti_id}),
+        ) as resp:
+            if resp.status_code >= 400:
+                raise LegifranceApiError(f"getArticle en erreur (status={resp.status_code})")
+
+            reader = _AsyncByteReader(resp)
+            # use_float : pas de Decimal (non sérialisable par orjson)
+            titles = ijson.items_async(reader, _THIN_TITLES_PREFIX, use_float=True)
+            async for value in titles:
+                if value:
+                    return {"article": {"textTitles": value}}  # inutile de lire la suite
+                break
+
+            full = orjson.loads(await reader.body())
+
+    except (
+        LegifranceApiError,
+        ijson.JSONError,
+        orjson.JSONDecodeError,
+        httpx.TimeoutException,
+        httpx.NetworkError,
+    ):
+        full = await lf_get_article(legiarti_id)
+
+    art = full.get("article") if isinstance(full, dict) else None
+    if isinstance(art, dict) and art.get("textTitles"):
+        return {"article": {"textTitles": art["textTitles"]}}
+    return full
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from app.config import BATCH_WINDOW_MS, MAX_BATCH
+from app.services.llm_openai import OpenAILLM
+
+
+# ================================
+# Micro-batching des appels LLM
+# ================================
+#
+# Les requêtes /plan concurrentes partagent le même prompt système et le même
+# modèle : on les regroupe sur une courte fenêtre pour n'émettre qu'un seul
+# appel OpenAI, puis on redistribue chaque objet JSON à son appelant.
+
+BATCH_INSTRUCTIONS = (
+    "MODE LOT : le message utilisateur contient plusieurs demandes indépendantes, "
+    "numérotées de 1 à N dans \"items\". Traite chacune séparément en appliquant "
+    "toutes les règles ci-dessus. Réponds avec un objet JSON "
+    "{\"results\": [{\"index\": i, \"output\": {...}}, ...]} : un élément par "
+    "demande, \"index\" reprenant le numéro de la demande, \"output\" le JSON attendu."
+)
+
+_Item = Tuple[str, str, Optional[str], "asyncio.Future[Dict[str, Any]]"]
+
+
+class LLMBatcher:
+    """
+    Regroupe les appels complete_json qui arrivent dans la même fenêtre
+    (BATCH_WINDOW_MS, au plus MAX_BATCH éléments) en un seul appel multi-prompt.
+    """
+
+    def __init__(
+        self,
+        llm: OpenAILLM,
+        window_ms: int = BATCH_WINDOW_MS,
+        max_batch: int = MAX_BATCH,
+    ):
+        self._llm = llm
+        self._window = window_ms / 1000
+        self._max_batch = max(1, max_batch)
+        self._queue: asyncio.Queue[_Item] = asyncio.Queue()
+        self._runner: Optional[asyncio.Task] = None
+        self._inflight: set[asyncio.Task] = set()
+        # prompt système "mode lot" par prompt de base : même chaîne à chaque appel
+        self._batch_systems: Dict[str, str] = {}
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        À appeler au shutdown : arrête la boucle et libère les appelants en attente.
+        """
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+        while not self._queue.empty():
+            *_, fut = self._queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(RuntimeError("LLMBatcher arrêté."))
+
+    async def submit(self, system: str, user: str, model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Équivalent de llm.complete_json(system=..., user=..., model=...),
+        mais potentiellement servi par un appel groupé.
+        """
+        fut: asyncio.Future[Dict[str, Any]] = asyncio.get_running_loop().create_future()
+        await self._queue.put((system, user, model, fut))
+        return await fut
+
+    # --------------------------------
+    # Boucle interne
+    # --------------------------------
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[_Item] = [await self._queue.get()]
+            deadline = loop.time() + self._window
+
+            try:
+                while len(batch) < self._max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # arrêt pendant la fenêtre : ne pas laisser ces appelants bloqués
+                for *_, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(RuntimeError("LLMBatcher arrêté."))
+                raise
+
+            # un appel par couple (prompt système, modèle)
+            groups: Dict[Tuple[str, Optional[str]], List[_Item]] = {}
+            for item in batch:
+                groups.setdefault((item[0], item[2]), []).append(item)
+
+            for (system, model), items in groups.items():
+                task = asyncio.create_task(self._dispatch(system, model, items))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, system: str, model: Optional[str], items: List[_Item]) -> None:
+        if len(items) > 1:
+            try:
+                outs = await self._complete_batch(system, model, [user for _, user, _, _ in items])
+            except Exception:
+                # échec de l'appel groupé (timeout, JSON tronqué, 5xx...) :
+                # on ne le propage pas à N requêtes, chaque item repart seul
+                outs = None
+
+            if outs is not None:
+                for (*_, fut), out in zip(items, outs):
+                    if not fut.done():
+                        fut.set_result(out)
+                return
+
+        await asyncio.gather(*(self._complete_one(system, model, item) for item in items))
+
+    async def _complete_one(self, system: str, model: Optional[str], item: _Item) -> None:
+        _, user, _, fut = item
+        try:
+            out = await self._llm.complete_json(system=system, user=user, model=model)
+        except Exception as e:
+            if not fut.done():
+                fut.set_exception(e)
+            return
+        if not fut.done():
+            fut.set_result(out)
+
+    async def _complete_batch(
+        self,
+        system: str,
+        model: Optional[str],
+        users: List[str],
+    ) -> List[Any]:
+        """
+        Un seul appel LLM pour N prompts utilisateur.
+        Les résultats sont rattachés par leur "index" (jamais par position).
+        Un slot manquant, dupliqué ou mal formé devient {} : la validation côté
+        appelant le rejettera et déclenchera son retry individuel.
+        """
+        batch_user = orjson.dumps(
+            {"items": [{"index": i, "input": u} for i, u in enumerate(users, start=1)]}
+        ).decode()
+        batch_system = self._batch_systems.get(system)
+        if batch_system is None:
+            # instructions de lot en queue : le préfixe (prompt de base) reste cacheable
+            batch_system = self._batch_systems[system] = system + "\n\n" + BATCH_INSTRUCTIONS
+
+        out = await self._llm.complete_json(
+            system=batch_system,
+            user=batch_user,
+            model=model,
+        )
+
+        results = out.get("results") if isinstance(out, dict) else None
+        if not isinstance(results, list):
+            results = []
+
+        by_index: Dict[int, Any] = {}
+        duplicated: set[int] = set()
+        for r in results:
+            if not isinstance(r, dict):
+                continue
+            idx = r.get("index")
+            if not isinstance(idx, int) or isinstance(idx, bool) or not 1 <= idx <= len(users):
+                continue
+            if idx in by_index:
+                duplicated.add(idx)
+            by_index[idx] = r.get("output")
+
+        outs: List[Any] = []
+        for i in range(1, len(users) + 1):
+            value = by_index.get(i)
+            outs.append(value if i not in duplicated and isinstance(value, dict) else {})
+        return outs
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, List
-
-from app.services.legifrance import lf_search, lf_get_article
+from typing import Any, Dict, Optional, List, Tuple
+
+from app.services.legifrance import (
+    LegifranceRateLimitedError,
+    lf_search,
+    lf_get_article,
+    lf_get_article_thin,
+)
+from app.services.shared_cache import cache_delete, cache_get, cache_set
 from app.utils.dates import iso_date_to_millis
 from app.utils.normalize import normalize_article_num, normalize_code_title
+from app.utils.singleflight import singleflight
 
 
 # =========================
@@ -42,7 +51,7 @@ class ResolvedArticle:
     title: Optional[str]           # titre du texte/code si dispo
     article_num: Optional[str]     # ex: "L1221-1"
     date_version: Optional[str]    # ISO 'YYYY-MM-DD'
-    raw: Dict[str, Any]            # réponse brute getArticle
+    raw: Dict[str, Any]            # réponse brute getArticle (réduite si thin=True)
 
 
 # =========================
@@ -98,6 +107,9 @@ def _extract_legiarti_id_from_search(search_resp: Dict[str, Any]) -> List[str]:
     if not isinstance(results, list):
         return []
 
+    prefix = "LEGIARTI"
+    append = ids.append
+
     for r in results:
         if not isinstance(r, dict):
             continue
@@ -106,24 +118,17 @@ def _extract_legiarti_id_from_search(search_resp: Dict[str, Any]) -> List[str]:
         arts = r.get("articles") or []
         if isinstance(arts, list):
             for a in arts:
-                if isinstance(a, dict):
-                    _id = a.get("id")
-                    if isinstance(_id, str) and _id.startswith("LEGIARTI"):
-                        ids.append(_id)
+                _id = a.get("id") if isinstance(a, dict) else None
+                if isinstance(_id, str) and _id.startswith(prefix):
+                    append(_id)
 
         # Parfois l'id est directement dans un champ "id"
         _id2 = r.get("id")
-        if isinstance(_id2, str) and _id2.startswith("LEGIARTI"):
-            ids.append(_id2)
+        if isinstance(_id2, str) and _id2.startswith(prefix):
+            append(_id2)
 
     # dédoublonne en conservant l'ordre
-    seen = set()
-    uniq: List[str] = []
-    for x in ids:
-        if x not in seen:
-            seen.add(x)
-            uniq.append(x)
-    return uniq
+    return list(dict.fromkeys(ids))
 
 
 def _fallback_payload_code_only(code_title: str) -> Dict[str, Any]:
@@ -167,19 +172,138 @@ def _extract_title_from_article_resp(article_resp: Dict[str, Any]) -> Optional[s
     return None
 
 
+# =========================
+# Cache LEGIARTI (code, article, date) -> id
+# =========================
+
+_LEGIARTI_TTL = 3600.0          # durée de vie d'une entrée (s)
+_LEGIARTI_REFRESH_AFTER = 300.0  # au-delà, un hit déclenche une revalidation en tâche de fond
+_LEGIARTI_MAX_ENTRIES = 4096
+
+_CacheKey = Tuple[str, str, Optional[str]]
+
+# L1 (mémoire du worker) : clé -> (legiarti_id, stocké_à en time.monotonic())
+# L2 (Redis, optionnel) : legiarti:{code}:{article}:{date} -> legiarti_id
+_LEGIARTI_CACHE: Dict[_CacheKey, Tuple[str, float]] = {}
+_refresh_tasks: Dict[_CacheKey, asyncio.Task] = {}
+
+
+def _legiarti_cache_get(key: _CacheKey) -> Optional[Tuple[str, float]]:
+    entry = _LEGIARTI_CACHE.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[1] > _LEGIARTI_TTL:
+        _LEGIARTI_CACHE.pop(key, None)
+        return None
+    return entry
+
+
+def _legiarti_cache_put(key: _CacheKey, legiarti_id: str) -> None:
+    _LEGIARTI_CACHE.pop(key, None)
+    if len(_LEGIARTI_CACHE) >= _LEGIARTI_MAX_ENTRIES:
+        # éviction de l'entrée la plus ancienne (ordre d'insertion)
+        _LEGIARTI_CACHE.pop(next(iter(_LEGIARTI_CACHE)), None)
+    _LEGIARTI_CACHE[key] = (legiarti_id, time.monotonic())
+
+
+def _legiarti_shared_key(key: _CacheKey) -> str:
+    code_title, article_num, date_hint = key
+    return f"legiarti:{code_title}:{article_num}:{date_hint or ''}"
+
+
+async def _legiarti_shared_get(key: _CacheKey) -> Optional[Tuple[str, float]]:
+    """
+    Miss L1 -> lecture L2 (partagé entre workers), recopiée en L1.
+    """
+    legiarti_id = await cache_get(_legiarti_shared_key(key))
+    if not legiarti_id:
+        return None
+    _legiarti_cache_put(key, legiarti_id)
+    return _LEGIARTI_CACHE[key]
+
+
+async def _legiarti_store(key: _CacheKey, legiarti_id: str) -> None:
+    _legiarti_cache_put(key, legiarti_id)
+    await cache_set(_legiarti_shared_key(key), legiarti_id, int(_LEGIARTI_TTL * 1000))
+
+
+async def _search_legiarti_ids(
+    code_title: str,
+    article_num: str,
+    date_hint: Optional[str],
+) -> Tuple[List[str], bool]:
+    """
+    POST /search (avec fallback élargi) -> (liste d'ID LEGIARTI, via_fallback).
+    via_fallback=True : recherche sur le seul nom du code, le 1er ID n'est pas
+    forcément l'article demandé -> ne jamais le mettre en cache.
+    """
+    payload = _search_payload_code_article(code_title, article_num, date_hint)
+
+    try:
+        search_resp = await lf_search(payload)
+    except LegifranceRateLimitedError:
+        # quota PISTE : surtout ne pas relancer une 2e recherche plus large
+        raise
+    except Exception:
+        # Fallback : élargit la recherche, au cas où NUM_ARTICLE exact + date déclenche un bug
+        search_resp = await lf_search(_fallback_payload_code_only(code_title))
+        return _extract_legiarti_id_from_search(search_resp), True
+
+    return _extract_legiarti_id_from_search(search_resp), False
+
+
+async def _refresh_search(key: _CacheKey) -> None:
+    """
+    Revalide une entrée du cache via /search (hors chemin critique).
+    """
+    try:
+        ids, via_fallback = await _search_legiarti_ids(*key)
+    except Exception:
+        return  # on garde l'entrée actuelle, elle expirera au TTL
+    finally:
+        _refresh_tasks.pop(key, None)
+
+    if via_fallback:
+        return  # résultat non spécifique : ni mise à jour ni éviction
+
+    if ids and len(ids) <= 3:
+        await _legiarti_store(key, ids[0])
+    else:
+        _LEGIARTI_CACHE.pop(key, None)
+        await cache_delete(_legiarti_shared_key(key))
+
+
+def _schedule_refresh(key: _CacheKey) -> None:
+    if key not in _refresh_tasks:
+        _refresh_tasks[key] = asyncio.create_task(_refresh_search(key))
+
+
 # =========================
 # Résolveurs métier (V1)
 # =========================
 
+def _resolve_key(
+    code_hint: str,
+    article_hint: str,
+    date_hint: Optional[str] = None,
+    thin: bool = False,
+) -> Tuple[Optional[str], Optional[str], Optional[str], bool]:
+    return (normalize_code_title(code_hint), normalize_article_num(article_hint), date_hint, thin)
+
+
+# Les requêtes identiques concurrentes (ex: retries Make) partagent un seul appel Légifrance
+@singleflight(_resolve_key)
 async def resolve_code_article(
     code_hint: str,
     article_hint: str,
     date_hint: Optional[str] = None,
+    thin: bool = False,
 ) -> ResolvedArticle:
     """
     Résout un article d'un code:
-      1) POST /search -> récupérer LEGIARTI...
+      1) POST /search -> récupérer LEGIARTI... (sauté si déjà en cache)
       2) POST /getArticle -> récupérer contenu
+         (thin=True : uniquement le titre, lu en streaming)
     """
     code_title = normalize_code_title(code_hint)
     article_num = normalize_article_num(article_hint)
@@ -187,30 +311,38 @@ async def resolve_code_article(
     if not code_title or not article_num:
         raise TooBroadError("code_hint ou article_hint manquant")
 
-    payload = _search_payload_code_article(code_title, article_num, date_hint)
-
-    try:
-        search_resp = await lf_search(payload)
-    except Exception:
-        # Fallback : élargit la recherche, au cas où NUM_ARTICLE exact + date déclenche un bug
-        search_resp = await lf_search(_fallback_payload_code_only(code_title))
-
-    ids = _extract_legiarti_id_from_search(search_resp)
-
-    if not ids:
-        raise NotFoundError(
-            f"Aucun article trouvé pour '{code_title}' article '{article_num}' (date={date_hint})."
-        )
-
-    # Si plusieurs IDs, on garde le 1er mais on signale ambiguïté si trop
-    if len(ids) > 3:
-        raise AmbiguousError(
-            f"Plusieurs articles possibles ({len(ids)}). Précise le code exact ou l'intitulé.",
-            candidates=[{"id": _id} for _id in ids[:10]],
-        )
-
-    legiarti_id = ids[0]
-    article_resp = await lf_get_article(legiarti_id)
+    key: _CacheKey = (code_title, article_num, date_hint)
+    cached = _legiarti_cache_get(key)
+    if cached is None:
+        cached = await _legiarti_shared_get(key)
+
+    if cached is not None:
+        legiarti_id, stored_at = cached
+        if time.monotonic() - stored_at > _LEGIARTI_REFRESH_AFTER:
+            _schedule_refresh(key)
+    else:
+        ids, via_fallback = await _search_legiarti_ids(code_title, article_num, date_hint)
+
+        if not ids:
+            raise NotFoundError(
+                f"Aucun article trouvé pour '{code_title}' article '{article_num}' (date={date_hint})."
+            )
+
+        # Si plusieurs IDs, on garde le 1er mais on signale ambiguïté si trop
+        if len(ids) > 3:
+            raise AmbiguousError(
+                f"Plusieurs articles possibles ({len(ids)}). Précise le code exact ou l'intitulé.",
+                candidates=[{"id": _id} for _id in ids[:10]],
+            )
+
+        legiarti_id = ids[0]
+        if not via_fallback:
+            await _legiarti_store(key, legiarti_id)
+
+    if thin:
+        article_resp = await lf_get_article_thin(legiarti_id)
+    else:
+        article_resp = await lf_get_article(legiarti_id)
 
     title = _extract_title_from_article_resp(article_resp)
 
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from typing import Any, Optional, Tuple
+
+from app.config import REDIS_URL, REDIS_TIMEOUT_MS
+
+# ================================
+# Cache partagé (Redis) entre workers uvicorn
+# ================================
+#
+# Optionnel : sans REDIS_URL, toutes les fonctions se comportent comme un cache
+# vide et chaque worker garde seulement son cache en mémoire (L1).
+# Une panne Redis ne doit jamais faire échouer une requête : erreur = miss.
+
+_redis: Optional[Any] = None  # redis.asyncio.Redis
+
+
+async def init_shared_cache() -> None:
+    """
+    À appeler au démarrage de l'app (lifespan).
+    """
+    global _redis
+    if not REDIS_URL or _redis is not None:
+        return
+
+    import redis.asyncio as aioredis
+
+    timeout = REDIS_TIMEOUT_MS / 1000
+    _redis = aioredis.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        socket_timeout=timeout,
+        socket_connect_timeout=timeout,
+    )
+
+
+async def aclose_shared_cache() -> None:
+    """
+    À appeler au shutdown de l'app.
+    """
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def shared_cache_enabled() -> bool:
+    return _redis is not None
+
+
+async def cache_get(key: str) -> Optional[str]:
+    if _redis is None:
+        return None
+    try:
+        return await _redis.get(key)
+    except Exception:
+        return None
+
+
+async def cache_get_with_ttl(key: str) -> Optional[Tuple[str, int]]:
+    """
+    GET + PTTL en un aller-retour. Retourne (valeur, ttl restant en ms),
+    ou None si absent, sans expiration ou Redis indisponible.
+    """
+    if _redis is None:
+        return None
+    try:
+        async with _redis.pipeline(transaction=True) as pipe:
+            value, ttl_ms = await pipe.get(key).pttl(key).execute()
+    except Exception:
+        return None
+    if value is None or ttl_ms is None or ttl_ms <= 0:
+        return None
+    return value, ttl_ms
+
+
+async def cache_set(key: str, value: str, ttl_ms: int, nx: bool = False) -> Optional[bool]:
+    """
+    SET key value PX ttl_ms [NX].
+    Retourne True si la valeur a été écrite, False si NX a échoué (clé déjà
+    présente), None si Redis est désactivé ou en erreur.
+    """
+    if _redis is None or ttl_ms <= 0:
+        return None
+    try:
+        return bool(await _redis.set(key, value, px=ttl_ms, nx=nx))
+    except Exception:
+        return None
+
+
+async def cache_delete(key: str) -> None:
+    if _redis is None:
+        return
+    try:
+        await _redis.delete(key)
+    except Exception:
+        pass
+
+
+async def cache_delete_if_equals(key: str, value: str) -> None:
+    """
+    Supprime key seulement si elle vaut encore value (compare-and-delete,
+    WATCH/MULTI : si un autre worker la réécrit entre-temps, on n'y touche pas).
+    """
+    if _redis is None:
+        return
+    try:
+        async with _redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(key)
+            if await pipe.get(key) != value:
+                await pipe.unwatch()
+                return
+            pipe.multi()
+            pipe.delete(key)
+            await pipe.execute()
+    except Exception:
+        # WatchError (clé modifiée entre-temps) ou panne : rien à supprimer
+        pass
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 
 
@@ -11,10 +12,20 @@ def iso_date_to_millis(date_str: Optional[str]) -> Optional[int]:
     """
     if not date_str:
         return None
+    return _iso_date_to_millis(date_str)
 
+
+@lru_cache(maxsize=1024)
+def _iso_date_to_millis(date_str: str) -> int:
     # On accepte aussi 'YYYY/MM/DD' par tolérance légère
     s = date_str.strip().replace("/", "-")
 
-    # format strict
-    dt = datetime.strptime(s, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    # chemin rapide: 'YYYY-MM-DD' exact, découpage manuel (évite strptime)
+    digits = s[:4] + s[5:7] + s[8:]
+    if len(s) == 10 and s[4] == "-" and s[7] == "-" and digits.isascii() and digits.isdigit():
+        dt = datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), tzinfo=timezone.utc)
+    else:
+        # format strict (mêmes tolérances / ValueError qu'avant)
+        dt = datetime.strptime(s, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
     return int(dt.timestamp() * 1000)
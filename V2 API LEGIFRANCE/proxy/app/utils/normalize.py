@@ -1,8 +1,17 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
+from string import ascii_letters
 from typing import Optional
 
+# Compilés une seule fois au chargement du module
+_DASH_RE = re.compile(r"\s*-\s*")
+_WS_RE = re.compile(r"\s+")
+
+# Les normaliseurs sont purs et les entrées très répétitives (mêmes codes,
+# mêmes articles) : mémoïsation via lru_cache, None filtré avant le cache.
+
 
 def normalize_article_num(raw: Optional[str]) -> Optional[str]:
     """
@@ -14,17 +23,22 @@ def normalize_article_num(raw: Optional[str]) -> Optional[str]:
     """
     if not raw:
         return None
+    return _normalize_article_num(raw)
+
 
+@lru_cache(maxsize=4096)
+def _normalize_article_num(raw: str) -> str:
     s = raw.strip()
 
     # compactage des espaces inutiles autour des tirets
-    s = re.sub(r"\s*-\s*", "-", s)
-
-    # si commence par une lettre (L,R,D...) + espaces + chiffres -> colle la lettre
-    s = re.sub(r"^([A-Za-z])\s+(\d)", r"\1\2", s)
+    s = _DASH_RE.sub("-", s)
 
     # réduit espaces multiples
-    s = re.sub(r"\s+", " ", s)
+    s = _WS_RE.sub(" ", s)
+
+    # si commence par une lettre (L,R,D...) + espace + chiffre -> colle la lettre
+    if len(s) >= 3 and s[0] in ascii_letters and s[1] == " " and s[2].isdecimal():
+        s = s[0] + s[2:]
 
     return s
 
@@ -35,6 +49,9 @@ def normalize_code_title(raw: Optional[str]) -> Optional[str]:
     """
     if not raw:
         return None
-    s = raw.strip()
-    s = re.sub(r"\s+", " ", s)
-    return s
+    return _normalize_code_title(raw)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_code_title(raw: str) -> str:
+    return _WS_RE.sub(" ", raw.strip())
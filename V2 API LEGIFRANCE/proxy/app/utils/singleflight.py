@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+def singleflight(
+    key_fn: Callable[..., Hashable],
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Coalesce les appels concurrents identiques d'une coroutine.
+    key_fn reçoit les mêmes arguments que la fonction décorée et renvoie la clé.
+    Le 1er appel lance le traitement, les doublons en vol attendent le même
+    résultat (ou la même exception). La clé est libérée dès la fin du traitement.
+    """
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        inflight: Dict[Hashable, asyncio.Task] = {}
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            key = key_fn(*args, **kwargs)
+
+            task = inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+                inflight[key] = task
+
+                def _release(t: asyncio.Task, key: Hashable = key) -> None:
+                    if inflight.get(key) is t:
+                        del inflight[key]
+
+                task.add_done_callback(_release)
+
+            # shield : l'annulation d'un appelant n'annule pas le traitement partagé
+            return await asyncio.shield(task)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Rend le package "app" importable quel que soit le dossier de lancement de pytest
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,109 @@
+import asyncio
+import itertools
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.routes.resolve as resolve_routes
+import app.services.legifrance as lf
+from app.main import create_app
+
+
+def _setup(monkeypatch, responses):
+    """
+    Branche un transport simulé qui rejoue `responses` (une par requête, la
+    dernière est répétée) et enregistre les requêtes, les tokens et les attentes.
+    """
+    seen = {"requests": [], "sleeps": []}
+    tokens = (f"t{i}" for i in itertools.count(1))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["requests"].append(request.headers["Authorization"])
+        return responses[min(len(seen["requests"]), len(responses)) - 1]
+
+    async def fake_fetch() -> str:
+        token = next(tokens)
+        lf._token_state = (token, float("inf"))
+        return token
+
+    async def fake_sleep(delay: float) -> None:
+        seen["sleeps"].append(delay)
+
+    monkeypatch.setattr(lf, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(lf, "_token_state", None)
+    monkeypatch.setattr(lf, "_fetch_new_token", fake_fetch)
+    monkeypatch.setattr(lf.asyncio, "sleep", fake_sleep)
+    return seen
+
+
+def test_429_honors_retry_after(monkeypatch):
+    seen = _setup(monkeypatch, [
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(200, json={"ok": True}),
+    ])
+
+    assert asyncio.run(lf.lf_search({})) == {"ok": True}
+    assert len(seen["requests"]) == 2
+    assert seen["sleeps"] == [2.0]
+
+
+def test_429_without_retry_after_backs_off_then_raises(monkeypatch):
+    seen = _setup(monkeypatch, [httpx.Response(429)])
+
+    with pytest.raises(lf.LegifranceRateLimitedError) as exc:
+        asyncio.run(lf.lf_search({}))
+
+    assert exc.value.retry_after is None
+    assert len(seen["requests"]) == lf._MAX_ATTEMPTS
+    # pas d'attente après le dernier essai ; backoff exponentiel ±25 %
+    assert len(seen["sleeps"]) == lf._MAX_ATTEMPTS - 1
+    for attempt, delay in enumerate(seen["sleeps"]):
+        base = min(lf._RETRY_INITIAL_DELAY * 2 ** attempt, lf._RETRY_MAX_DELAY)
+        assert 0.75 * base <= delay <= 1.25 * base
+
+
+def test_429_retry_after_over_cap_gives_up_at_once(monkeypatch):
+    seen = _setup(monkeypatch, [httpx.Response(429, headers={"Retry-After": "30"})])
+
+    with pytest.raises(lf.LegifranceRateLimitedError) as exc:
+        asyncio.run(lf.lf_search({}))
+
+    assert exc.value.retry_after == 30.0
+    assert len(seen["requests"]) == 1
+    assert seen["sleeps"] == []
+
+
+@pytest.mark.parametrize("value", ["inf", "-inf", "nan"])
+def test_non_finite_retry_after_is_ignored(value):
+    resp = httpx.Response(429, headers={"Retry-After": value})
+    assert lf._parse_retry_after(resp) is None
+
+
+def test_double_401_refreshes_once_then_fails(monkeypatch):
+    seen = _setup(monkeypatch, [httpx.Response(401)])
+
+    with pytest.raises(lf.LegifranceApiError) as exc:
+        asyncio.run(lf.lf_search({}))
+
+    assert not isinstance(exc.value, lf.LegifranceRateLimitedError)
+    assert "status=401" in str(exc.value)
+    assert seen["requests"] == ["Bearer t1", "Bearer t2"]
+    assert seen["sleeps"] == []
+
+
+def test_route_maps_infinite_retry_after_to_429(monkeypatch):
+    _setup(monkeypatch, [httpx.Response(429, headers={"Retry-After": "inf"})])
+
+    async def fake_resolve(**kwargs):
+        return await lf.lf_search({})
+
+    monkeypatch.setattr(resolve_routes, "resolve_code_article", fake_resolve)
+
+    resp = TestClient(create_app()).get(
+        "/resolve/code-article", params={"code": "Code du travail", "article": "L1221-1"}
+    )
+
+    assert resp.status_code == 429
+    assert resp.json()["error"] == "RATE_LIMITED"
+    assert "Retry-After" not in resp.headers
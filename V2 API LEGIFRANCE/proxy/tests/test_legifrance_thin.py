@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+import ijson
+import orjson
+import pytest
+
+import app.services.legifrance as lf
+from app.services.resolver import _extract_title_from_article_resp
+
+
+def _chunked(body: bytes, size: int, consumed: list):
+    async def gen():
+        yield b""  # chunk vide possible côté httpx : ne doit pas valoir EOF
+        for i in range(0, len(body), size):
+            consumed.append(i)
+            yield body[i:i + size]
+    return gen()
+
+
+ARTICLE = {
+    "article": {
+        "id": "LEGIARTI000000000001",
+        "textTitles": [{"title": "Code du travail", "score": 0.5}],
+        "texte": "x" * 50_000,
+        "texteHtml": "<p>" + "y" * 50_000 + "</p>",
+        "num": "L1221-1",
+        "dateVersion": 1577836800000,
+    }
+}
+
+
+def test_async_byte_reader_feeds_ijson():
+    body = orjson.dumps(ARTICLE)
+
+    async def run():
+        resp = httpx.Response(200, content=_chunked(body, 1024, []))
+        reader = lf._AsyncByteReader(resp)
+        return [v async for v in ijson.items_async(reader, "article.num")]
+
+    assert asyncio.run(run()) == ["L1221-1"]
+
+
+def test_thin_article_stops_after_titles(monkeypatch):
+    body = orjson.dumps(ARTICLE)
+    consumed: list = []
+    requests: list = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, content=_chunked(body, 1024, consumed))
+
+    async def fake_token() -> str:
+        return "token"
+
+    async def run():
+        monkeypatch.setattr(lf, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(lf, "get_token", fake_token)
+        return await lf.lf_get_article_thin("LEGIARTI000000000001")
+
+    thin = asyncio.run(run())
+
+    assert thin == {"article": {"textTitles": [{"title": "Code du travail", "score": 0.5}]}}
+    assert len(requests) == 1  # pas de repli sur lf_get_article
+    assert len(consumed) < len(body) // 1024 // 10  # arrêt avant le texte
+    orjson.dumps(thin)  # pas de Decimal
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"article": {"titles": [{"title": "Code X"}], "texte": "x" * 5_000}},
+        {"article": {"textTitles": [], "titles": [{"title": "Code X"}]}},
+        {"textTitles": [{"title": "Code X"}], "num": "L1"},  # réponse déjà "article-like"
+    ],
+)
+def test_thin_article_same_title_as_full(monkeypatch, payload):
+    body = orjson.dumps(payload)
+    requests: list = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, content=_chunked(body, 64, []))
+
+    async def fake_token() -> str:
+        return "token"
+
+    async def run():
+        monkeypatch.setattr(lf, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(lf, "get_token", fake_token)
+        thin = await lf.lf_get_article_thin("LEGIARTI000000000001")
+        full = await lf.lf_get_article("LEGIARTI000000000001")
+        return thin, full
+
+    thin, full = asyncio.run(run())
+
+    assert _extract_title_from_article_resp(thin) == "Code X"
+    assert _extract_title_from_article_resp(full) == "Code X"
+    assert len(requests) == 2  # un seul appel pour le mode thin, pas de repli